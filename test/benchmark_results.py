@@ -0,0 +1,52 @@
+# Comparison of benchmark_templates.py results against a saved baseline. Kept
+# apart from the benchmark so it does not need jinja2 or the components package.
+
+# Measured fields of every step and what they are reported as
+FIELDS = (('ms', 'wall time ms'), ('peak_kib', 'peak memory KiB'))
+
+
+def flatten(results, field='ms'):
+    """Map every timed step of a results dict to its value of field, scenario
+    steps are keyed as <scenario>.<step>"""
+    values = {}
+    for name, entry in results.items():
+        if not isinstance(entry, dict):
+            continue
+        if field in entry:
+            values[name] = entry[field]
+            continue
+        for step, stats in entry.items():
+            if isinstance(stats, dict) and field in stats:
+                values['{}.{}'.format(name, step)] = stats[field]
+    return values
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """Print every wall time and memory peak next to its baseline, return the
+    (step, field) pairs that grew by more than their threshold"""
+    regressions = []
+    thresholds = {'ms': threshold, 'peak_kib': memory_threshold}
+
+    for field, title in FIELDS:
+        current = flatten(results, field)
+        previous = flatten(baseline, field)
+
+        print("{:<40} {:>12} {:>12} {:>8}".format(title, 'baseline', 'current', 'ratio'))
+        for key in sorted(set(current) | set(previous)):
+            if key not in previous:
+                print("{:<40} {:>12} {:>12.3f} {:>8}  <-- new".format(key, '-', current[key], '-'))
+            elif key not in current:
+                print("{:<40} {:>12.3f} {:>12} {:>8}  <-- removed".format(key, previous[key], '-', '-'))
+            elif not previous[key]:
+                print("{:<40} {:>12.3f} {:>12.3f} {:>8}  <-- zero baseline".format(key, previous[key],
+                                                                                  current[key], 'n/a'))
+            else:
+                ratio = current[key] / previous[key]
+                marker = ''
+                if ratio > thresholds[field]:
+                    marker = '  <-- regression'
+                    regressions.append((key, field))
+                print("{:<40} {:>12.3f} {:>12.3f} {:>7.2f}x{}".format(key, previous[key], current[key], ratio,
+                                                                       marker))
+        print()
+    return regressions
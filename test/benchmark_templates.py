@@ -0,0 +1,193 @@
+# Timings for the ACP template rendering pipeline, built on the scenarios in
+# test_templates.py. Run it from the test directory like the template tests:
+#
+#   python benchmark_templates.py --output results.json
+#   python benchmark_templates.py --output new.json --baseline results.json
+#
+# Compile, render, YAML parse and check_template_errors are timed separately,
+# along with the production template_manager.render_template for each scenario.
+# Parsing is timed with yaml.safe_load as in production, and additionally with
+# the libyaml CSafeLoader as "parse_libyaml" when PyYAML was built with it.
+# Wall times come from untraced runs, the peak python memory of every step
+# from one extra run under tracemalloc. Both are checked against --baseline.
+# A scenario whose render_template returns errors gets no render_template
+# figures, its errors are recorded instead and the run exits 1.
+
+import argparse
+import ipaddress
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import jinja2
+import yaml
+
+from components.maintenance import template_manager
+from components.scriptgenerator.generic_solution.template_handler import template_constants
+
+from benchmark_results import compare
+
+TEMPLATE_ID = 'ACP_Template_0_3'
+TEMPLATE_STORE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../templates")
+
+SCENARIOS = {
+    'primary_small': {'datacenter_id': 'NAR2', 'cust_num': 2, 'cust_name': 'Robin', 'cc_users': 500,
+                      'uc_users': 0, 'num_users': 500, 'easg_enable': True},
+    'primary_huge': {'datacenter_id': 'NAR2', 'cust_num': 2, 'cust_name': 'Robin', 'cc_users': 32000,
+                     'uc_users': 0, 'num_users': 32000, 'easg_enable': True},
+    'full_primary_small': {'datacenter_id': 'EMEA2', 'cust_num': 2, 'cust_name': 'Robin', 'cc_users': 500,
+                           'uc_users': 0, 'num_users': 500, 'easg_enable': True},
+    'full_secondary_small': {'datacenter_id': 'EMEA1', 'cust_num': 2, 'cust_name': 'Robin', 'cc_users': 500,
+                             'uc_users': 0, 'num_users': 500, 'easg_enable': False},
+    'uc_only_small': {'datacenter_id': 'EMEA1', 'cust_num': 1, 'cust_name': 'Robin', 'cc_users': 0,
+                      'uc_users': 500, 'num_users': 500, 'easg_enable': True},
+    'cc_only_large': {'datacenter_id': 'EMEA1', 'cust_num': 1, 'cust_name': 'Robin', 'cc_users': 32000,
+                      'uc_users': 0, 'num_users': 32000, 'easg_enable': True},
+    'mixture_large': {'datacenter_id': 'EMEA1', 'cust_num': 1, 'cust_name': 'Robin', 'cc_users': 16000,
+                      'uc_users': 16000, 'num_users': 32000, 'easg_enable': True},
+    '42DC': {'datacenter_id': 'NAR1', 'cust_num': 3, 'cust_name': 'Robin', 'cc_users': 500, 'num_users': 500,
+             'easg_enable': True, 'custom_network': False,
+             'dc2id': {'NAR1': 8, 'NAR2': 9, 'EMEA1': 17, 'EMEA2': 25, 'APAC1': 33, 'APAC2': 41, 'CALA1': 49,
+                       'CALA2': 57}},
+    'custom_network': {'datacenter_id': 'NAR1', 'cust_num': 3, 'cust_name': 'Robin', 'cc_users': 500,
+                       'num_users': 500, 'easg_enable': True, 'custom_network': True,
+                       'subnets': {'NAR1': [
+                           {'type': 'apps', 'gw': '10.136.116.1', 'vlan': 1000, 'port_grp': 'APPS_LAN',
+                            'prefix': '24'},
+                           {'type': 'oobm', 'gw': '10.136.116.1', 'vlan': 1000, 'port_grp': 'OOBM_LAN',
+                            'prefix': '24'},
+                           {'type': 'cm_dup', 'gw': '192.168.51.1', 'vlan': 1001, 'port_grp': 'CM_DUPL_LAN',
+                            'prefix': '24'}]}},
+    'AOC': {'datacenter_id': 'NAR1', 'cust_num': 3, 'cust_name': 'Robin', 'cc_users': 500, 'num_users': 500,
+            'easg_enable': True, 'custom_network': False, 'env': 'AOC'},
+    'IBM': {'datacenter_id': 'NAR1', 'cust_num': 3, 'cust_name': 'Robin', 'cc_users': 500, 'num_users': 500,
+            'easg_enable': True, 'custom_network': False, 'env': 'IBM'},
+}
+
+# Dummy Cluster and Datastore parameters to allow operation of the cluster macro
+SCENARIO_GLOBALS = {
+    'IBM': {'vdc': 'DC1-ENG', 'cluster_id': 1},
+}
+
+
+@jinja2.contextfunction
+def set_global(ctx, k, v):
+    if v:
+        ctx["global"][k] = v
+
+
+# Not memoized, every render pays for its own network parsing
+def ip_net(addr, prefix):
+    return ipaddress.ip_network(f"{addr}/{prefix}", strict=False)
+
+
+def measure(func, repeat):
+    """Time func repeat times without tracing, then run it once more under
+    tracemalloc. Return the result of that run, the median wall time in
+    milliseconds and the peak traced memory in KiB"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, {'ms': round(statistics.median(durations), 3), 'peak_kib': round(peak / 1024, 1)}
+
+
+def compile_template():
+    template_loader = jinja2.FileSystemLoader(searchpath=os.path.join(TEMPLATE_STORE_DIR, TEMPLATE_ID))
+    # jinja2.ext.do is needed by the custom_network scenario
+    env = jinja2.Environment(loader=template_loader, extensions=["jinja2.ext.do"])
+    template = env.get_template(TEMPLATE_ID + '.tmpl')
+    env.globals["set_global"] = set_global
+    env.globals["ip_net"] = ip_net
+    return template
+
+
+def run_benchmarks(repeat):
+    results = {'libyaml': hasattr(yaml, 'CSafeLoader')}
+    template, results['compile'] = measure(compile_template, repeat)
+    template_constants.TEMPLATE_STORE_LOCATION = TEMPLATE_STORE_DIR
+
+    for name, template_variables in SCENARIOS.items():
+        scenario_globals = SCENARIO_GLOBALS.get(name, {})
+        template.environment.globals.update(scenario_globals)
+        try:
+            rendered, render_stats = measure(lambda: template.render(template_variables), repeat)
+        finally:
+            for key in scenario_globals:
+                del template.environment.globals[key]
+        scenario = {'render': render_stats, 'output_kib': round(len(rendered) / 1024, 1)}
+        _, scenario['parse'] = measure(lambda: yaml.safe_load(rendered), repeat)
+        if results['libyaml']:
+            _, scenario['parse_libyaml'] = measure(lambda: yaml.load(rendered, Loader=yaml.CSafeLoader), repeat)
+        # What a deployment pays: render and parse through the production pipeline
+        (_, error_list), render_template_stats = measure(
+            lambda: template_manager.render_template(TEMPLATE_ID, template_variables), repeat)
+        if error_list:
+            scenario['render_template_errors'] = [str(error) for error in error_list]
+        else:
+            scenario['render_template'] = render_template_stats
+        results[name] = scenario
+
+    _, results['check_template_errors'] = measure(lambda: template_manager.check_template_errors(TEMPLATE_ID),
+                                                  repeat)
+    return results
+
+
+def failed_scenarios(results):
+    return [name for name, entry in results.items()
+            if isinstance(entry, dict) and 'render_template_errors' in entry]
+
+
+def repeat_count(value):
+    repeat = int(value)
+    if repeat < 1:
+        raise argparse.ArgumentTypeError("must be at least 1, got {}".format(value))
+    return repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ACP template rendering pipeline")
+    parser.add_argument('--repeat', type=repeat_count, default=5, help="runs per step, the median is reported")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="wall time ratio against the baseline reported as a regression")
+    parser.add_argument('--memory-threshold', type=float, default=1.2,
+                        help="peak memory ratio against the baseline reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    rc = 0
+    for name in failed_scenarios(results):
+        print("Scenario {} rendered with errors: {}".format(name, results[name]['render_template_errors']),
+              file=sys.stderr)
+        rc = 1
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.threshold, args.memory_threshold):
+            rc = 1
+    else:
+        print(json.dumps(results, indent=2))
+    return rc
+
+
+if __name__ == '__main__':
+    sys.exit(main())
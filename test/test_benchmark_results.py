@@ -0,0 +1,65 @@
+from benchmark_results import compare, flatten
+
+
+def results(compile_ms, render_ms, parse_ms, render_kib=1.0):
+    return {'libyaml': True,
+            'compile': {'ms': compile_ms, 'peak_kib': 1.0},
+            'primary_small': {'render': {'ms': render_ms, 'peak_kib': render_kib},
+                              'parse': {'ms': parse_ms, 'peak_kib': 1.0},
+                              'output_kib': 10.0}}
+
+
+def report_lines(output, title):
+    """Lines of the section of a compare() report that starts with title,
+    keyed by step"""
+    sections = output.split('\n\n')
+    section = [lines for lines in sections if lines.startswith(title)][0]
+    return {line.split()[0]: line for line in section.splitlines()[1:]}
+
+
+def test_flatten():
+    timings = flatten(results(10, 5, 2))
+    assert timings == {'compile': 10, 'primary_small.render': 5, 'primary_small.parse': 2}
+
+    peaks = flatten(results(10, 5, 2, render_kib=3.0), 'peak_kib')
+    assert peaks == {'compile': 1.0, 'primary_small.render': 3.0, 'primary_small.parse': 1.0}
+
+
+def test_compare_no_regression(capsys):
+    assert compare(results(10, 5, 2), results(10, 5, 2), 1.2, 1.2) == []
+    output = capsys.readouterr().out
+    assert output.splitlines()[0].split() == ['wall', 'time', 'ms', 'baseline', 'current', 'ratio']
+    assert 'peak memory KiB' in output
+    assert 'regression' not in output
+
+
+def test_compare_regression(capsys):
+    regressions = compare(results(10, 7, 2), results(10, 5, 2), 1.2, 1.2)
+    assert regressions == [('primary_small.render', 'ms')]
+    assert 'regression' in capsys.readouterr().out
+
+    # Slower but within the threshold
+    assert compare(results(11, 5, 2), results(10, 5, 2), 1.2, 1.2) == []
+
+
+def test_compare_memory_regression(capsys):
+    regressions = compare(results(10, 5, 2, render_kib=2.0), results(10, 5, 2), 1.2, 1.5)
+    assert regressions == [('primary_small.render', 'peak_kib')]
+    lines = report_lines(capsys.readouterr().out, 'peak memory KiB')
+    assert lines['primary_small.render'].endswith('<-- regression')
+
+    # The memory threshold is separate from the wall time one
+    assert compare(results(10, 5, 2, render_kib=2.0), results(10, 5, 2), 1.2, 2.5) == []
+
+
+def test_compare_added_removed_and_zero(capsys):
+    current = results(10, 5, 2)
+    current['primary_small']['parse_libyaml'] = {'ms': 1, 'peak_kib': 1.0}
+    baseline = results(0, 5, 2)
+    baseline['check_template_errors'] = {'ms': 50, 'peak_kib': 1.0}
+
+    assert compare(current, baseline, 1.2, 1.2) == []
+    lines = report_lines(capsys.readouterr().out, 'wall time ms')
+    assert lines['primary_small.parse_libyaml'].endswith('<-- new')
+    assert lines['check_template_errors'].endswith('<-- removed')
+    assert lines['compile'].endswith('<-- zero baseline')